@@ -13,6 +13,11 @@ from pdf_processor import outline_from_pdf
 from text_utils import ascii_punctuate, clean_bold_and_punct
 from outline_parser import parse_md_outline, get_outline_and_title
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 
 def main():
     """Main entry point for the PDF outline extractor."""
@@ -24,6 +29,7 @@ Examples:
   python main.py document.pdf                    # Print outline to stdout
   python main.py document.pdf --pretty          # Pretty print with indentation
   python main.py document.pdf -o outline.json   # Save to file
+  python main.py document.pdf --no-cache        # Skip the outline cache
         """
     )
     parser.add_argument(
@@ -39,6 +45,11 @@ Examples:
         action="store_true", 
         help="Pretty print JSON output with indentation"
     )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Ignore and do not update the on-disk outline cache"
+    )
     
     args = parser.parse_args()
     
@@ -49,11 +60,17 @@ Examples:
     
     try:
         # Extract outline from PDF
-        result = outline_from_pdf(args.pdf_path)
+        result = outline_from_pdf(args.pdf_path, use_cache=False if args.no_cache else None)
         
-        # Format JSON output
-        indent = 2 if args.pretty else None
-        json_output = json.dumps(result, indent=indent)
+        # Format JSON output (orjson when installed; the stdlib fallback is
+        # configured to produce the same bytes)
+        if orjson is not None:
+            option = orjson.OPT_INDENT_2 if args.pretty else 0
+            json_output = orjson.dumps(result, option=option).decode('utf-8')
+        elif args.pretty:
+            json_output = json.dumps(result, indent=2, ensure_ascii=False)
+        else:
+            json_output = json.dumps(result, separators=(',', ':'), ensure_ascii=False)
         
         # Write to file or stdout
         if args.output:
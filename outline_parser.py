@@ -2,63 +2,104 @@
 Markdown parsing and outline generation functionality.
 """
 import re
+import sys
 from text_utils import ascii_punctuate, clean_bold_and_punct
 
+# Classifies a stripped line in one match: a separator rule, a markdown
+# heading (1-4 hashes) or a line that is entirely bold.
+_LINE_RE = re.compile(
+    r"(?:(?P<sep>[.\-*,=\"']{2,})"
+    r"|(?P<h>#{1,4}) +(?P<htxt>.+)"
+    r"|_?\*\*(?P<btxt>.*?)\*\*_?)\s*$"
+)
+# Shared level strings so every outline entry references the same objects
+_H1, _H2, _H3 = sys.intern('H1'), sys.intern('H2'), sys.intern('H3')
+_HEAD_LEVELS = (_H1, _H1, _H2, _H3)
+_TOC_LEVELS = (_H1, _H2, _H3)
+
+
+def _is_lower_start(s):
+    # ASCII a-z only; headings starting with other lowercase letters are kept
+    return bool(s) and 'a' <= s[0] <= 'z'
+
 
 def parse_md_outline(md: str, page_num: int):
-    result = []
+    """
+    Return the headings on one page as parallel (levels, texts, pages) lists.
+    """
+    levels, texts, pages = [], [], []
     for ln in md.splitlines():
-        if re.fullmatch(r"^[\.\-\*,=\"']{2,}\s*$", ln.strip()):
+        # Only lines with a heading or bold marker can be outline entries
+        if '#' not in ln and '**' not in ln:
             continue
-        line = ascii_punctuate(ln.strip())
-        lvl = None
-        txt = None
-        if line.startswith('# '):
-            lvl = 'H1'
-            txt = clean_bold_and_punct(line[2:].strip())
-        elif line.startswith('## '):
-            lvl = 'H1'
-            txt = clean_bold_and_punct(line[3:].strip())
-        elif line.startswith('### '):
-            lvl = 'H2'
-            txt = clean_bold_and_punct(line[4:].strip())
-        elif line.startswith('#### '):
-            lvl = 'H3'
-            txt = clean_bold_and_punct(line[5:].strip())
-        elif re.fullmatch(r'_?\*\*(.*?)\*\*_?', line):
-            lvl = 'H3'
+        # Classify the raw line: separators are judged before punctuation is
+        # normalised, and the cleaners below normalise heading text themselves
+        line = ln.strip()
+        m = _LINE_RE.match(line)
+        if m is None or m.lastgroup == 'sep':
+            continue
+        if m.lastgroup == 'htxt':
+            lvl = _HEAD_LEVELS[len(m.group('h')) - 1]
+            txt = clean_bold_and_punct(m.group('htxt'))
+        else:
+            lvl = _H3
             txt = clean_bold_and_punct(line)
-        if txt and re.match(r'^[a-z]', txt):
+        if _is_lower_start(txt):
             continue
         if lvl and txt:
-            result.append({
-                'level': lvl,
-                'text': txt,
-                'page': page_num + 1
-            })
-    return result
+            levels.append(lvl)
+            texts.append(txt)
+            pages.append(page_num + 1)
+    return levels, texts, pages
+
+
+def _parse_page(md_text, toc_items, idx):
+    """
+    Parse one page's markdown and merge in its TOC entries.
+    """
+    levels, texts, pages = parse_md_outline(md_text, idx)
+    seen = set(texts)
+    for toc in toc_items:
+        if isinstance(toc, (list, tuple)) and len(toc) >= 2:
+            lvl, txt = toc[0], clean_bold_and_punct(toc[1])
+            if not _is_lower_start(txt) and txt not in seen:
+                seen.add(txt)
+                levels.append(_TOC_LEVELS[lvl - 1] if 1 <= lvl <= 3 else _H3)
+                texts.append(txt)
+                pages.append(idx + 1)
+    return levels, texts, pages
+
+
+def _page_title(md_text):
+    """
+    Return the first '# ' heading on a page that does not start lowercase,
+    or None if the page has none.
+    """
+    for ln in md_text.splitlines():
+        line = ascii_punctuate(ln.strip())
+        if line.startswith('# '):
+            candidate = clean_bold_and_punct(line[2:].strip())
+            if not _is_lower_start(candidate):
+                return candidate
+    return None
 
 
 def get_outline_and_title(md_pages):
-    doc_title = 'Untitled'
-    for pg in md_pages:
-        for ln in pg.get('text', '').splitlines():
-            line = ascii_punctuate(ln.strip())
-            if line.startswith('# '):
-                candidate = clean_bold_and_punct(line[2:].strip())
-                if not re.match(r'^[a-z]', candidate):
-                    doc_title = candidate
-                    break
-        if doc_title != 'Untitled':
-            break
-    output = {'title': doc_title, 'outline': []}
+    """
+    Build the document title and outline from pymupdf4llm page chunks.
+
+    `md_pages` may be a list or any iterable of page dicts; it is consumed
+    one page at a time, so only the extracted headings are kept.
+    """
+    doc_title = None
+    levels, texts, pages = [], [], []
     for idx, pg in enumerate(md_pages):
-        items = parse_md_outline(pg.get('text', ''), idx)
-        for toc in pg.get('toc_items', []):
-            if isinstance(toc, (list, tuple)) and len(toc) >= 2:
-                lvl, txt = toc[0], clean_bold_and_punct(toc[1])
-                if not re.match(r'^[a-z]', txt) and txt not in {e['text'] for e in items}:
-                    level = f"H{lvl if 1 <= lvl <= 3 else 3}"
-                    items.append({'level': level, 'text': txt, 'page': idx + 1})
-        output['outline'].extend(items)
-    return output
+        md_text = pg.get('text', '')
+        if doc_title is None:
+            doc_title = _page_title(md_text)
+        pg_levels, pg_texts, pg_pages = _parse_page(md_text, pg.get('toc_items', []), idx)
+        levels.extend(pg_levels)
+        texts.extend(pg_texts)
+        pages.extend(pg_pages)
+    outline = [{'level': l, 'text': t, 'page': p} for l, t, p in zip(levels, texts, pages)]
+    return {'title': 'Untitled' if doc_title is None else doc_title, 'outline': outline}
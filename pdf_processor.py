@@ -1,23 +1,101 @@
 """
 PDF processing functionality for extracting outlines and titles.
 """
+import hashlib
 import json
+import os
+import pymupdf
 import pymupdf4llm
 from outline_parser import get_outline_and_title
+from text_utils import ascii_punctuate, clean_bold_and_punct
 
+CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'adobe_part_2')
+# Oldest (least recently used) entries beyond this count are evicted
+CACHE_MAX_ENTRIES = 256
+# Bump whenever outline_parser/text_utils change their output so stale
+# cached outlines are not served
+CACHE_VERSION = 2
 
-def outline_from_pdf(pdf_path):
+
+def _cache_key(pdf_path):
+    path = os.path.abspath(pdf_path)
+    # The converter version matters too: it produces the markdown we parse
+    converter = getattr(pymupdf4llm, '__version__', None) or getattr(pymupdf4llm, 'version', '')
+    stamp = f"{CACHE_VERSION}|{converter}|{path}|{os.path.getmtime(path)}|{os.path.getsize(path)}"
+    return hashlib.blake2b(stamp.encode('utf-8'), digest_size=16).hexdigest()
+
+
+def _evict_cache():
+    entries = [os.path.join(CACHE_DIR, f) for f in os.listdir(CACHE_DIR) if f.endswith('.json')]
+    if len(entries) <= CACHE_MAX_ENTRIES:
+        return
+    entries.sort(key=os.path.getmtime)
+    for path in entries[:len(entries) - CACHE_MAX_ENTRIES]:
+        os.remove(path)
+
+
+def outline_from_pdf(pdf_path, use_cache=None):
     """
     Extract outline and title from a PDF file.
+
+    Results are cached on disk under CACHE_DIR, keyed by CACHE_VERSION and
+    the file's path, modification time and size.
     
     Args:
         pdf_path (str): Path to the PDF file
+        use_cache (bool, optional): Read and write the on-disk cache. Defaults
+            to on unless the PDF_OUTLINE_NO_CACHE=1 environment variable is set.
         
     Returns:
         dict: Dictionary containing title and outline information
     """
-    md = pymupdf4llm.to_markdown(pdf_path, page_chunks=True)
-    return get_outline_and_title(md)
+    if use_cache is None:
+        use_cache = os.getenv('PDF_OUTLINE_NO_CACHE') != '1'
+    cache_path = os.path.join(CACHE_DIR, _cache_key(pdf_path) + '.json')
+    outline = None
+    if use_cache:
+        try:
+            with open(cache_path, encoding='utf-8') as f:
+                outline = json.load(f)
+        except (OSError, ValueError):
+            pass
+    if outline is not None:
+        try:
+            os.utime(cache_path)  # mark as recently used for eviction
+        except OSError:
+            pass
+        return outline
+
+    # Convert one page at a time so each page's markdown is dropped once parsed.
+    # Header detection scans font sizes across the whole document, so do it
+    # once here rather than letting every per-page call repeat it. With
+    # pymupdf_layout installed, pymupdf4llm switches to layout mode and removes
+    # IdentifyHeaders; that path detects headers itself.
+    with pymupdf.open(pdf_path) as doc:
+        identify_headers = getattr(pymupdf4llm, 'IdentifyHeaders', None)
+        md_kwargs = {'hdr_info': identify_headers(doc)} if identify_headers else {}
+        md_pages = (
+            pymupdf4llm.to_markdown(doc, pages=[i], page_chunks=True, **md_kwargs)[0]
+            for i in range(doc.page_count)
+        )
+        outline = get_outline_and_title(md_pages)
+    # Memoized cleaners only pay off within a document; drop them between files
+    ascii_punctuate.cache_clear()
+    clean_bold_and_punct.cache_clear()
+
+    if not use_cache:
+        return outline
+    # The cache is best-effort; an unwritable cache directory is not an error
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(outline, f)
+        os.replace(tmp_path, cache_path)
+        _evict_cache()
+    except OSError:
+        pass
+    return outline
 
 
 # Example usage:
@@ -1,10 +1,12 @@
 #!/usr/bin/env python3
 from __future__ import annotations
+import functools
+import hashlib
 import json
 import os
-import shutil
 import re
 import sys
+from collections import defaultdict
 from datetime import datetime
 from typing import List, Dict, Any, Optional, Union
 
@@ -15,40 +17,58 @@ from langchain.schema.document import Document
 from langchain_chroma import Chroma
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+# Single-character substitutions applied in one str.translate pass:
+# unicode ligatures -> ASCII, bullets -> dash, smart quotes -> straight.
+_CLEAN_TRANS = str.maketrans({
+    '\ufb00': 'ff',  # ﬀ
+    '\ufb01': 'fi',  # ﬁ
+    '\ufb02': 'fl',  # ﬂ
+    '\ufb03': 'ffi', # ﬃ
+    '\ufb04': 'ffl', # ﬄ
+    '\ufb05': 'ft',  # ﬅ
+    '\ufb06': 'st',  # ﬆ
+    '\u2022': '-',   # •
+    '\u2019': "'",
+    '\u201c': '"',
+    '\u201d': '"',
+})
+
+_MD_HASH = re.compile(r'#+')
+_MD_BACKTICK = re.compile(r'`([^`]+)`')
+_MD_BOLD = re.compile(r'\*\*([^*]+)\*\*')
+_MD_EM = re.compile(r'\*([^*]+)\*')
+_MD_UNDER = re.compile(r'_([^_]+)_')
+_WS2 = re.compile(r"[ ]{2,}")
+_NL = re.compile(r"\s*\n+\s*")
+
+# Documents per ONNX inference call when embedding chunks
+EMBED_BATCH_SIZE = 128
 
-def clean_text(text: str) -> str:
-    # Normalize common unicode ligatures → ASCII
-    ligatures = {
-        '\ufb00': 'ff',  # ﬀ
-        '\ufb01': 'fi',  # ﬁ
-        '\ufb02': 'fl',  # ﬂ
-        '\ufb03': 'ffi', # ﬃ
-        '\ufb04': 'ffl', # ﬄ
-        '\ufb05': 'ft',  # ﬅ
-        '\ufb06': 'st',  # ﬆ
-    }
-    for uni, ascii_equiv in ligatures.items():
-        text = text.replace(uni, ascii_equiv)
 
-    # Convert unicode bullets to a dash
-    # Handle both explicit escape and actual char
-    text = text.replace('\\u2022', '-')
-    text = text.replace('•', '-')
+def clean_text(text: str) -> str:
+    # Normalize ligatures, bullets and smart quotes in a single pass
+    text = text.translate(_CLEAN_TRANS)
+    # Bullets that arrive as a literal escape sequence
+    if '\\u2022' in text:
+        text = text.replace('\\u2022', '-')
     # Remove redundant bullet-dot combos
     text = text.replace('-.', '-')
-    # Replace smart quotes with straight ones
-    text = text.replace('\u2019', "'")
-    text = text.replace('\u201c', '"').replace('\u201d', '"')
     # Strip common Markdown syntax
-    text = re.sub(r'#+' , '', text)
-    text = re.sub(r'`([^`]+)`', r'\1', text)
-    text = re.sub(r'\*\*([^*]+)\*\*', r'\1', text)
-    text = re.sub(r'\*([^*]+)\*', r'\1', text)
-    text = re.sub(r'_([^_]+)_', r'\1', text)
+    text = _MD_HASH.sub('', text)
+    text = _MD_BACKTICK.sub(r'\1', text)
+    text = _MD_BOLD.sub(r'\1', text)
+    text = _MD_EM.sub(r'\1', text)
+    text = _MD_UNDER.sub(r'\1', text)
     # Collapse multiple spaces
-    text = re.sub(r"[ ]{2,}", ' ', text)
+    text = _WS2.sub(' ', text)
     # Replace newlines with spaces so sentences only end at actual periods
-    text = re.sub(r"\s*\n+\s*", ' ', text)
+    text = _NL.sub(' ', text)
     # Ensure sentence boundaries only at periods
     parts = [p.strip() for p in text.split('. ') if p.strip()]
     text = '. '.join(parts)
@@ -59,6 +79,14 @@ def clean_text(text: str) -> str:
     return text
 
 
+@functools.lru_cache(maxsize=None)
+def _load_text_embedding(model_path: Optional[str] = None) -> TextEmbedding:
+    # One model instance per path, shared by every embedding wrapper
+    if model_path:
+        return TextEmbedding(model_name_or_path=model_path)
+    return TextEmbedding()
+
+
 def get_embedding_function(model_path: Optional[str] = None):
     """
     Returns an embedding function wrapper that loads a fastembed model offline.
@@ -67,13 +95,12 @@ def get_embedding_function(model_path: Optional[str] = None):
     """
     class EmbeddingWrapper:
         def __init__(self):
-            if model_path:
-                self.model = TextEmbedding(model_name_or_path=model_path)
-            else:
-                self.model = TextEmbedding()
+            self.model = _load_text_embedding(model_path)
+            # Identifies which model produced stored vectors (see build_chroma)
+            self.model_id = model_path or getattr(self.model, 'model_name', 'fastembed-default')
 
         def embed_documents(self, texts: List[str]) -> List[List[float]]:
-            return list(self.model.embed(texts))
+            return list(self.model.embed(texts, batch_size=EMBED_BATCH_SIZE, parallel=0))
 
         def embed_query(self, text: str) -> List[float]:
             return list(self.model.embed([text]))[0]
@@ -81,31 +108,21 @@ def get_embedding_function(model_path: Optional[str] = None):
     return EmbeddingWrapper()
 
 
-def load_and_split_documents(
-    data_path: str,
+def split_documents(
+    docs: List[Document],
     chunk_size: int = 1000,
     chunk_overlap: int = 100
 ) -> List[Document]:
-    docs: List[Document] = []
-    # Sentence-aware splitting on full stops
+    # Sentence-aware splitting on full stops; keep each '. ' at the end of the
+    # sentence it closes so chunks neither start with it nor lose a sentence
+    # to the trim below
     splitter = RecursiveCharacterTextSplitter(
         chunk_size=chunk_size,
         chunk_overlap=chunk_overlap,
         length_function=len,
-        separators=['\\. ', '\n\n', '\n', ' ', '']
+        separators=['. ', '\n\n', '\n', ' ', ''],
+        keep_separator='end'
     )
-
-    for fname in sorted(os.listdir(data_path)):
-        if not fname.lower().endswith('.pdf'):
-            continue
-        full_path = os.path.join(data_path, fname)
-        pdf = pymupdf.open(full_path)
-        for page_num in range(len(pdf)):
-            raw_text = pdf[page_num].get_text("text")
-            docs.append(Document(page_content=raw_text, metadata={'source': fname, 'page': page_num + 1}))
-        pdf.close()
-
-    # Split documents into chunks that respect sentence boundaries
     chunks = splitter.split_documents(docs)
     # Trim each chunk to end at the last full stop
     for c in chunks:
@@ -116,14 +133,47 @@ def load_and_split_documents(
     return chunks
 
 
+def load_and_split_documents(
+    data_path: str,
+    chunk_size: int = 1000,
+    chunk_overlap: int = 100
+) -> List[Document]:
+    docs: List[Document] = []
+    for fname in sorted(os.listdir(data_path)):
+        if not fname.lower().endswith('.pdf'):
+            continue
+        full_path = os.path.join(data_path, fname)
+        with pymupdf.open(full_path) as pdf:
+            texts = [page.get_text("text") for page in pdf]
+        docs.extend(
+            Document(page_content=raw_text, metadata={'source': fname, 'page': page_num + 1})
+            for page_num, raw_text in enumerate(texts)
+        )
+
+    # Split documents into chunks that respect sentence boundaries
+    return split_documents(docs, chunk_size, chunk_overlap)
+
+
 def calculate_chunk_ids(chunks: List[Document]) -> None:
-    last: Optional[str] = None
-    idx = 0
+    # Number chunks per (source, page); IDs stay unique even if a page's
+    # chunks are not contiguous in the list
+    counters: Dict[str, int] = defaultdict(int)
     for c in chunks:
         key = f"{c.metadata['source']}:{c.metadata['page']}"
-        idx = idx + 1 if key == last else 0
-        c.metadata['id'] = f"{key}:{idx}"
-        last = key
+        c.metadata['id'] = f"{key}:{counters[key]}"
+        counters[key] += 1
+
+
+def _corpus_fingerprint(chunks: List[Document], model_id: str) -> str:
+    h = hashlib.blake2b(digest_size=16)
+    h.update(model_id.encode('utf-8'))
+    h.update(b'\0')
+    for c in chunks:
+        h.update(c.metadata['id'].encode('utf-8'))
+        h.update(b'\0')
+        h.update(c.page_content.encode('utf-8'))
+        h.update(b'\0')
+    return h.hexdigest()
 
 
 def build_chroma(
@@ -131,17 +181,46 @@ def build_chroma(
     persist_directory: str = 'chroma',
     embedding_function=None
 ) -> Chroma:
-    # Always reset to repopulate database
-    if os.path.exists(persist_directory):
-        shutil.rmtree(persist_directory)
-    
     # Use provided embedding function or fall back to global one
     if embedding_function is None:
         embedding_function = globals().get('embedded_fn') or get_embedding_function()
-    
+
+    model_id = getattr(embedding_function, 'model_id', type(embedding_function).__name__)
+    model_id_path = os.path.join(persist_directory, '.embedding_model')
+    stored_model_id = None
+    if os.path.exists(model_id_path):
+        with open(model_id_path) as f:
+            stored_model_id = f.read().strip()
+
     db = Chroma(persist_directory=persist_directory, embedding_function=embedding_function)
+    if stored_model_id != model_id:
+        # Vectors from another (or unknown) model cannot be mixed with ours
+        db.delete_collection()
+        db = Chroma(persist_directory=persist_directory, embedding_function=embedding_function)
     calculate_chunk_ids(chunks)
-    db.add_documents(documents=chunks, ids=[c.metadata['id'] for c in chunks])
+    fingerprint = _corpus_fingerprint(chunks, model_id)
+    fingerprint_path = os.path.join(persist_directory, '.fingerprint')
+    if os.path.exists(fingerprint_path):
+        with open(fingerprint_path) as f:
+            if f.read().strip() == fingerprint:
+                return db
+
+    # Only embed chunks that are new or changed, and drop ones no longer present
+    existing = db.get(include=['documents'])
+    existing_docs = dict(zip(existing['ids'], existing['documents']))
+    new_ids = {c.metadata['id'] for c in chunks}
+    stale_ids = [i for i in existing_docs if i not in new_ids]
+    if stale_ids:
+        db.delete(ids=stale_ids)
+    changed = [c for c in chunks if existing_docs.get(c.metadata['id']) != c.page_content]
+    if changed:
+        db.add_documents(documents=changed, ids=[c.metadata['id'] for c in changed])
+
+    os.makedirs(persist_directory, exist_ok=True)
+    with open(model_id_path, 'w') as f:
+        f.write(model_id)
+    with open(fingerprint_path, 'w') as f:
+        f.write(fingerprint)
     return db
 
 
@@ -227,8 +306,13 @@ def get_json_result_for_query(
     if output_path:
         if not os.path.isabs(output_path):
             output_path = os.path.abspath(output_path)
-        with open(output_path, 'w') as f_out:
-            json.dump(result, f_out, indent=2)
+        if orjson is not None:
+            with open(output_path, 'wb') as f_out:
+                f_out.write(orjson.dumps(result, option=orjson.OPT_INDENT_2))
+        else:
+            # Same bytes as the orjson branch: indent 2, raw UTF-8
+            with open(output_path, 'w', encoding='utf-8') as f_out:
+                json.dump(result, f_out, indent=2, ensure_ascii=False)
     return result
 
 
@@ -0,0 +1,30 @@
+#!/usr/bin/env python3
+"""
+Tests for the sentence-aware chunking in src/semantic_search.py.
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+
+
+def test_split_documents_keeps_every_sentence():
+    """Chunks must not start with the '. ' separator or drop whole sentences."""
+    from langchain.schema.document import Document
+    from semantic_search import split_documents
+
+    sentences = [f"Sentence number {i} talks about topic {i} in some detail." for i in range(40)]
+    doc = Document(page_content=' '.join(sentences), metadata={'source': 'a.pdf', 'page': 1})
+    chunks = split_documents([doc], chunk_size=300, chunk_overlap=100)
+
+    assert len(chunks) > 1
+    for c in chunks:
+        assert not c.page_content.startswith('.'), c.page_content[:20]
+    joined = '\n'.join(c.page_content for c in chunks)
+    missing = [s for s in sentences if s not in joined]
+    assert not missing, missing
+
+
+if __name__ == "__main__":
+    test_split_documents_keeps_every_sentence()
+    print("✓ split_documents keeps every sentence")
@@ -1,35 +1,50 @@
 """
 Text utility functions for cleaning and normalizing text content.
 """
+import functools
 import re
 
+_BACKTICK_RE = re.compile(r'`([^`]+)`')
+_BOLD_RE = re.compile(r'_?\*\*(.*?)\*\*_?')
+_TRAIL_NUM_RE = re.compile(r'\b(\d+)$')
+_REPEAT_PUNCT_RE = re.compile(r'[\.\-\,\"\=]{2,}')
 
+# Single-character unicode punctuation -> ASCII; the ellipsis expands to
+# three characters and is handled separately in ascii_punctuate.
+_PUNCT_TRANS = str.maketrans({
+    '\u2018': "'",
+    '\u2019': "'",
+    '\u201c': '"',
+    '\u201d': '"',
+    '\u2013': '-',
+    '\u2014': '-',
+})
+
+
+@functools.lru_cache(maxsize=4096)
 def ascii_punctuate(text: str) -> str:
     """
     Replace common unicode punctuation with ASCII equivalents.
     """
-    subs = {
-        "'": "'",
-        "'": "'",
-        """: '"',
-        """: '"',
-        "–": '-',
-        "—": '-',
-        "…": '...'
-    }
-    for u, a in subs.items():
-        text = text.replace(u, a)
+    text = text.translate(_PUNCT_TRANS)
+    if '\u2026' in text:
+        text = text.replace('\u2026', '...')
     return text
 
 
+@functools.lru_cache(maxsize=4096)
 def clean_bold_and_punct(text: str) -> str:
     """
     Remove backticks, bold markers, trailing numbers, repeated punctuation, and normalize whitespace.
     """
     text = ascii_punctuate(text)
-    text = re.sub(r'`([^`]+)`', r"\1", text)
-    text = text.replace('`', '')
-    text = re.sub(r'_?\*\*(.*?)\*\*_?', r"\1", text)
-    text = re.sub(r'(?:\b)(\d+)$', '', text)
-    text = re.sub(r'[\.\-\,\"\=]{2,}', '', text)
+    # Most lines carry no markup; only run the passes whose markers are present
+    if '`' in text:
+        text = _BACKTICK_RE.sub(r"\1", text)
+        text = text.replace('`', '')
+    if '**' in text:
+        text = _BOLD_RE.sub(r"\1", text)
+    if text[-1:].isdigit() or text[-1:] == '\n':
+        text = _TRAIL_NUM_RE.sub('', text)
+    text = _REPEAT_PUNCT_RE.sub('', text)
     return ' '.join(text.split()).strip()